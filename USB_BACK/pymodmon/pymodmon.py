@@ -990,7 +990,4 @@ if (arguments['--single'] == True):
 
 ## since we start a timer thread for periodic pulling of data we need no "while True:" loop
 # for staying in the application
-#from time import sleep
-#while True:
-#    sleep(15)
     
@@ -166,6 +166,7 @@ class Inout:
     LCD_D5 = 24
     LCD_D6 = 23
     LCD_D7 = 18
+    LCD_DATA = (LCD_D4, LCD_D5, LCD_D6, LCD_D7) # data lines, written together
      
     # Define some device constants
     LCD_WIDTH = 20    # Maximum characters per line
@@ -178,8 +179,20 @@ class Inout:
     LCD_LINE_4 = 0xD4 # LCD RAM address for the 4th line
      
     # Timing constants
-    E_PULSE = 0.0005
-    E_DELAY = 0.0005
+    #  HD44780: enable pulse >= 450 ns, most commands take 37 µs, clear display 1.52 ms
+    E_PULSE = 0.000001
+    E_DELAY = 0.00004
+    E_DELAY_INIT = 0.0005 # slower timing used while the display is initialised
+    CLEAR_DELAY = 0.002
+    BUSY_WAIT_LIMIT = 0.0001 # shorter waits are done busy, time.sleep oversleeps them by far
+    e_delay = E_DELAY_INIT
+
+    # BCM283x GPIO register offsets for direct register access
+    GPIO_SET0 = 0x1C  # writing a 1 bit sets the pin
+    GPIO_CLR0 = 0x28  # writing a 1 bit clears the pin
+    gpio_mem  = None  # memory mapped GPIO registers, None if RPi.GPIO has to be used
+    pi        = None  # connection to the pigpio daemon, None if the lines are written from Python
+    lgpio_handle = None # lgpio chip handle, used when the registers cannot be mapped
     
     lcd_line     = 1
     lcd_column   = 1
@@ -266,72 +279,204 @@ class Inout:
         import time
 
         # LCD interface setup
-        self.GPIO.setmode(self.GPIO.BCM)       # Use BCM GPIO numbers
-        self.GPIO.setup(self.LCD_E, self.GPIO.OUT)  # E
-        self.GPIO.setup(self.LCD_RS, self.GPIO.OUT) # RS
-        self.GPIO.setup(self.LCD_D4, self.GPIO.OUT) # DB4
-        self.GPIO.setup(self.LCD_D5, self.GPIO.OUT) # DB5
-        self.GPIO.setup(self.LCD_D6, self.GPIO.OUT) # DB6
-        self.GPIO.setup(self.LCD_D7, self.GPIO.OUT) # DB7
+        # the lines are claimed through lgpio first, the data lines as one group,
+        #  so a nibble is written with one call instead of one call per pin,
+        #  this also works on the Pi 5 where RPi.GPIO and the register access do not
+        try:
+            import lgpio
+            self.lgpio = lgpio
+            self.lgpio_handle = lgpio.gpiochip_open(0)
+            lgpio.group_claim_output(self.lgpio_handle, list(self.LCD_DATA))
+            lgpio.gpio_claim_output(self.lgpio_handle, self.LCD_RS)
+            lgpio.gpio_claim_output(self.lgpio_handle, self.LCD_E)
+        except:
+            if self.lgpio_handle is not None:
+                try:
+                    self.lgpio.gpiochip_close(self.lgpio_handle)
+                except:
+                    pass
+            self.lgpio_handle = None
+        if self.lgpio_handle is None:
+            self.GPIO.setmode(self.GPIO.BCM)       # Use BCM GPIO numbers
+            self.GPIO.setup(self.LCD_E, self.GPIO.OUT)  # E
+            self.GPIO.setup(self.LCD_RS, self.GPIO.OUT) # RS
+            self.GPIO.setup(self.LCD_D4, self.GPIO.OUT) # DB4
+            self.GPIO.setup(self.LCD_D5, self.GPIO.OUT) # DB5
+            self.GPIO.setup(self.LCD_D6, self.GPIO.OUT) # DB6
+            self.GPIO.setup(self.LCD_D7, self.GPIO.OUT) # DB7
+
+        # map the GPIO registers to write the pins directly instead of one RPi.GPIO call per pin
+        #  the pins are still configured as outputs by RPi.GPIO above,
+        #  only done on SoCs known to have the BCM2835 register layout behind /dev/gpiomem
+        self.gpio_mem = None
+        if self.lgpio_handle is None and self.lcd_bcm_soc():
+            try:
+                import mmap
+                gpio_fd = os.open('/dev/gpiomem', os.O_RDWR | os.O_SYNC)
+                self.gpio_mem = mmap.mmap(gpio_fd, 4096)
+                os.close(gpio_fd)
+            except:
+                self.gpio_mem = None
+        # with a running pigpio daemon whole lines are sent as one DMA timed waveform
+        try:
+            import pigpio
+            self.pigpio = pigpio
+            self.pi = pigpio.pi()
+            if not self.pi.connected:
+                self.pi = None
+        except:
+            self.pi = None
+        self.LCD_DATA_MASK = (1<<self.LCD_D4)|(1<<self.LCD_D5)|(1<<self.LCD_D6)|(1<<self.LCD_D7)
+        # lookup table with the data line pin mask for every nibble value
+        self.NIBBLE_SET = [self.lcd_nibble_mask(nibble) for nibble in range(16)]
+        # pin masks of the high and the low nibble for every byte value
+        self.BYTE_SET = [(self.NIBBLE_SET[bits>>4], self.NIBBLE_SET[bits&0x0F]) for bits in range(256)]
+        import struct
+        self.gpio_pack = struct.Struct('<I').pack_into
+        # same for RPi.GPIO: levels of D4..D7 for every nibble value
+        self.NIBBLE_LEVELS = [(bool(n&1), bool(n&2), bool(n&4), bool(n&8)) for n in range(16)]
      
         # Initialise display
+        self.e_delay = self.E_DELAY_INIT
         self.lcd_byte(0x33,self.LCD_CMD) # 110011 Initialise
         self.lcd_byte(0x32,self.LCD_CMD) # 110010 Initialise
         self.lcd_byte(0x06,self.LCD_CMD) # 000110 Cursor move direction
         self.lcd_byte(0x0C,self.LCD_CMD) # 001100 Display On,Cursor Off, Blink Off
         self.lcd_byte(0x28,self.LCD_CMD) # 101000 Data length, number of lines, font size
         self.lcd_byte(0x01,self.LCD_CMD) # 000001 Clear display
-        time.sleep(self.E_DELAY)
+        time.sleep(self.CLEAR_DELAY)
+        self.e_delay = self.E_DELAY
+
+        # text currently shown on each line, used by lcd_string to skip unchanged characters
+        self.lcd_cache = {}
      
+    def lcd_bcm_soc(self):
+        # True on the Pi 1 to 4, their GPIO registers have the BCM2835 layout used by gpio_write,
+        #  the Pi 5 (BCM2712) has its GPIOs on the RP1 chip with a different layout
+        try:
+            with open('/proc/device-tree/compatible', 'rb') as compatible:
+                socs = compatible.read().split(b'\0')
+        except:
+            return False
+        return any(soc in socs for soc in (b'brcm,bcm2835', b'brcm,bcm2836', b'brcm,bcm2837', b'brcm,bcm2711'))
+
+    def gpio_write(self, register, mask):
+        # write a pin mask to a memory mapped GPIO register
+        self.gpio_pack(self.gpio_mem, register, mask)
+
+    def lcd_nibble_mask(self, nibble):
+        # pin mask of the data lines D4..D7 for the given 4 bits
+        # only used to fill NIBBLE_SET in lcd_init
+        return (((nibble   )&1)<<self.LCD_D4) | (((nibble>>1)&1)<<self.LCD_D5) | \
+               (((nibble>>2)&1)<<self.LCD_D6) | (((nibble>>3)&1)<<self.LCD_D7)
+
+    def lcd_byte_mem(self, bits, mode):
+        # same as lcd_byte but using the memory mapped GPIO registers,
+        # all four data lines are written with one store
+        high, low = self.BYTE_SET[bits&0xFF]
+        self.gpio_write(self.GPIO_SET0 if mode else self.GPIO_CLR0, 1<<self.LCD_RS) # RS
+
+        # High bits
+        self.gpio_write(self.GPIO_CLR0, self.LCD_DATA_MASK)
+        self.gpio_write(self.GPIO_SET0, high)
+        self.lcd_toggle_enable()
+
+        # Low bits
+        self.gpio_write(self.GPIO_CLR0, self.LCD_DATA_MASK)
+        self.gpio_write(self.GPIO_SET0, low)
+        self.lcd_toggle_enable()
+
+    def lcd_byte_lgpio(self, bits, mode):
+        # same as lcd_byte but using lgpio, the group of D4..D7 has D4 as
+        # lowest bit, so the nibble is written as it is
+        self.lgpio.gpio_write(self.lgpio_handle, self.LCD_RS, 1 if mode else 0) # RS
+
+        # High bits
+        self.lgpio.group_write(self.lgpio_handle, self.LCD_D4, (bits>>4)&0x0F)
+        self.lcd_toggle_enable()
+
+        # Low bits
+        self.lgpio.group_write(self.lgpio_handle, self.LCD_D4, bits&0x0F)
+        self.lcd_toggle_enable()
+
     def lcd_byte(self, bits, mode):
         # Send byte to data pins
         # bits = data
         # mode = True  for character
         #        False for command
+        if self.gpio_mem is not None:
+            self.lcd_byte_mem(bits, mode)
+            return
+        if self.lgpio_handle is not None:
+            self.lcd_byte_lgpio(bits, mode)
+            return
+
         self.GPIO.output(self.LCD_RS, mode) # RS
      
         # High bits
-        self.GPIO.output(self.LCD_D4, False)
-        self.GPIO.output(self.LCD_D5, False)
-        self.GPIO.output(self.LCD_D6, False)
-        self.GPIO.output(self.LCD_D7, False)
-        if bits&0x10==0x10:
-            self.GPIO.output(self.LCD_D4, True)
-        if bits&0x20==0x20:
-            self.GPIO.output(self.LCD_D5, True)
-        if bits&0x40==0x40:
-            self.GPIO.output(self.LCD_D6, True)
-        if bits&0x80==0x80:
-            self.GPIO.output(self.LCD_D7, True)
+        self.GPIO.output(self.LCD_DATA, self.NIBBLE_LEVELS[(bits>>4)&0x0F])
 
         # Toggle 'Enable' pin
         self.lcd_toggle_enable()
      
         # Low bits
-        self.GPIO.output(self.LCD_D4, False)
-        self.GPIO.output(self.LCD_D5, False)
-        self.GPIO.output(self.LCD_D6, False)
-        self.GPIO.output(self.LCD_D7, False)
-        if bits&0x01==0x01:
-            self.GPIO.output(self.LCD_D4, True)
-        if bits&0x02==0x02:
-            self.GPIO.output(self.LCD_D5, True)
-        if bits&0x04==0x04:
-            self.GPIO.output(self.LCD_D6, True)
-        if bits&0x08==0x08:
-            self.GPIO.output(self.LCD_D7, True)
+        self.GPIO.output(self.LCD_DATA, self.NIBBLE_LEVELS[bits&0x0F])
      
         # Toggle 'Enable' pin
         self.lcd_toggle_enable()
      
+    def lcd_wave_byte(self, pulses, bits, mode):
+        # append the pulses for one byte to a pigpio waveform, the nibbles are
+        # set up, latched with the enable pulse and followed by the command delay
+        rs = (1<<self.LCD_RS) if mode else 0
+        for nibble in ((bits>>4)&0x0F, bits&0x0F):
+            on = self.NIBBLE_SET[nibble] | rs
+            off = (self.LCD_DATA_MASK | (1<<self.LCD_RS)) & ~on
+            pulses.append(self.pigpio.pulse(on, off, int(self.e_delay*1000000)))
+            pulses.append(self.pigpio.pulse(1<<self.LCD_E, 0, int(self.E_PULSE*1000000)))
+            pulses.append(self.pigpio.pulse(0, 1<<self.LCD_E, int(self.e_delay*1000000)))
+
+    def lcd_send_wave(self, address, message):
+        # send the address command and the characters as one waveform,
+        # pigpio clocks it out by DMA without Python in the loop
+        import time
+        pulses = []
+        self.lcd_wave_byte(pulses, address, self.LCD_CMD)
+        for char in bytearray(message):
+            self.lcd_wave_byte(pulses, char, self.LCD_CHR)
+        self.pi.wave_add_generic(pulses)
+        wave = self.pi.wave_create()
+        self.pi.wave_send_once(wave)
+        while self.pi.wave_tx_busy():
+            time.sleep(0.001)
+        self.pi.wave_delete(wave)
+
     def lcd_toggle_enable(self):
         # Toggle enable
+        self.lcd_wait(self.e_delay)
+        if self.gpio_mem is not None:
+            self.gpio_write(self.GPIO_SET0, 1<<self.LCD_E)
+            self.lcd_wait(self.E_PULSE)
+            self.gpio_write(self.GPIO_CLR0, 1<<self.LCD_E)
+        elif self.lgpio_handle is not None:
+            self.lgpio.gpio_write(self.lgpio_handle, self.LCD_E, 1)
+            self.lcd_wait(self.E_PULSE)
+            self.lgpio.gpio_write(self.lgpio_handle, self.LCD_E, 0)
+        else:
+            self.GPIO.output(self.LCD_E, True)
+            self.lcd_wait(self.E_PULSE)
+            self.GPIO.output(self.LCD_E, False)
+        self.lcd_wait(self.e_delay)
+
+    def lcd_wait(self, seconds):
+        # wait for the LCD, busy waiting for intervals too short for time.sleep
         import time
-        time.sleep(self.E_DELAY)
-        self.GPIO.output(self.LCD_E, True)
-        time.sleep(self.E_PULSE)
-        self.GPIO.output(self.LCD_E, False)
-        time.sleep(self.E_DELAY)
+        if seconds >= self.BUSY_WAIT_LIMIT:
+            time.sleep(seconds)
+            return
+        end = time.time() + seconds
+        while time.time() < end:
+            pass
      
     def lcd_string(self, message, line, style):
         # Send string to display
@@ -345,11 +490,32 @@ class Inout:
             message = message.center(self.LCD_WIDTH," ")
         elif style==3:
             message = message.rjust(self.LCD_WIDTH," ")
+        if isinstance(message, unicode): # the LCD can only display single byte characters
+            message = message.encode('ascii', 'replace')
+        message = message[:self.LCD_WIDTH]
+
+        # only send the part of the line that differs from the displayed text
+        shown = self.lcd_cache.get(line)
+        if message == shown:
+            return
+        first = 0
+        last  = self.LCD_WIDTH-1
+        if shown is not None:
+            while message[first] == shown[first]:
+                first += 1
+            while message[last] == shown[last]:
+                last -= 1
      
-        self.lcd_byte(line, self.LCD_CMD)
+        if self.pi is not None:
+            self.lcd_send_wave(line+first, message[first:last+1])
+            self.lcd_cache[line] = message
+            return
+
+        self.lcd_byte(line+first, self.LCD_CMD)
      
-        for i in range(self.LCD_WIDTH):
-            self.lcd_byte(ord(message[i]),self.LCD_CHR)
+        for char in bytearray(message[first:last+1]):
+            self.lcd_byte(char,self.LCD_CHR)
+        self.lcd_cache[line] = message
 
     ## function for writing to LCD
     #
@@ -588,7 +754,10 @@ class Inout:
         ## if data is available, write polled data from buffer to disk
         if len(data.databuffer):
             self.writeLoggerDataFile()
-        self.GPIO.cleanup() 
+        if self.lgpio_handle is not None:
+            self.lgpio.gpiochip_close(self.lgpio_handle)
+        else:
+            self.GPIO.cleanup() 
         print 'PyModMonLCD has exited cleanly.'
 
     ## function for printing the current configuration settings
@@ -1069,6 +1069,10 @@ LCD_D4 = 25
 LCD_D5 = 24
 LCD_D6 = 23
 LCD_D7 = 18
+LCD_DATA = [LCD_D4, LCD_D5, LCD_D6, LCD_D7] # data lines, written together
+ 
+# Data line levels for every nibble value, D4 carries the lowest bit
+NIBBLE = [(bool(n&1), bool(n&2), bool(n&4), bool(n&8)) for n in range(16)]
  
 # Define some device constants
 LCD_WIDTH = 20    # Maximum characters per line
@@ -1081,8 +1085,13 @@ LCD_LINE_3 = 0x94 # LCD RAM address for the 3rd line
 LCD_LINE_4 = 0xD4 # LCD RAM address for the 4th line
  
 # Timing constants
-E_PULSE = 0.0005
-E_DELAY = 0.0005
+#  HD44780: enable pulse >= 450 ns, most commands take 37 us, clear display 1.52 ms
+E_PULSE = 0.000001
+E_DELAY = 0.00004
+E_DELAY_INIT = 0.0005 # slower timing used while the display is initialised
+CLEAR_DELAY = 0.002
+BUSY_WAIT_LIMIT = 0.0001 # shorter waits are done busy, time.sleep oversleeps them by far
+e_delay = E_DELAY_INIT
  
 def main():
   # Main program block
@@ -1113,6 +1122,7 @@ def main():
     time.sleep(3) # 3 second delay
  
 def lcd_init():
+  global e_delay
   # LCD interface setup
   GPIO.setmode(GPIO.BCM)       # Use BCM GPIO numbers
   GPIO.setup(LCD_E, GPIO.OUT)  # E
@@ -1129,7 +1139,8 @@ def lcd_init():
   lcd_byte(0x0C,LCD_CMD) # 001100 Display On,Cursor Off, Blink Off
   lcd_byte(0x28,LCD_CMD) # 101000 Data length, number of lines, font size
   lcd_byte(0x01,LCD_CMD) # 000001 Clear display
-  time.sleep(E_DELAY)
+  time.sleep(CLEAR_DELAY)
+  e_delay = E_DELAY
  
 def lcd_byte(bits, mode):
   # Send byte to data pins
@@ -1140,46 +1151,33 @@ def lcd_byte(bits, mode):
   GPIO.output(LCD_RS, mode) # RS
  
   # High bits
-  GPIO.output(LCD_D4, False)
-  GPIO.output(LCD_D5, False)
-  GPIO.output(LCD_D6, False)
-  GPIO.output(LCD_D7, False)
-  if bits&0x10==0x10:
-    GPIO.output(LCD_D4, True)
-  if bits&0x20==0x20:
-    GPIO.output(LCD_D5, True)
-  if bits&0x40==0x40:
-    GPIO.output(LCD_D6, True)
-  if bits&0x80==0x80:
-    GPIO.output(LCD_D7, True)
+  GPIO.output(LCD_DATA, NIBBLE[(bits>>4)&0x0F])
  
   # Toggle 'Enable' pin
   lcd_toggle_enable()
  
   # Low bits
-  GPIO.output(LCD_D4, False)
-  GPIO.output(LCD_D5, False)
-  GPIO.output(LCD_D6, False)
-  GPIO.output(LCD_D7, False)
-  if bits&0x01==0x01:
-    GPIO.output(LCD_D4, True)
-  if bits&0x02==0x02:
-    GPIO.output(LCD_D5, True)
-  if bits&0x04==0x04:
-    GPIO.output(LCD_D6, True)
-  if bits&0x08==0x08:
-    GPIO.output(LCD_D7, True)
+  GPIO.output(LCD_DATA, NIBBLE[bits&0x0F])
  
   # Toggle 'Enable' pin
   lcd_toggle_enable()
  
 def lcd_toggle_enable():
   # Toggle enable
-  time.sleep(E_DELAY)
+  lcd_wait(e_delay)
   GPIO.output(LCD_E, True)
-  time.sleep(E_PULSE)
+  lcd_wait(E_PULSE)
   GPIO.output(LCD_E, False)
-  time.sleep(E_DELAY)
+  lcd_wait(e_delay)
+ 
+def lcd_wait(seconds):
+  # wait for the LCD, busy waiting for intervals too short for time.sleep
+  if seconds >= BUSY_WAIT_LIMIT:
+    time.sleep(seconds)
+    return
+  end = time.time() + seconds
+  while time.time() < end:
+    pass
  
 def lcd_string(message,line,style):
   # Send string to display
@@ -1196,8 +1194,8 @@ def lcd_string(message,line,style):
  
   lcd_byte(line, LCD_CMD)
  
-  for i in range(LCD_WIDTH):
-    lcd_byte(ord(message[i]),LCD_CHR)
+  for char in bytearray(message[:LCD_WIDTH]):
+    lcd_byte(char,LCD_CHR)
  
 if __name__ == '__main__':
  
@@ -1207,5 +1205,6 @@ if __name__ == '__main__':
     pass
   finally:
     lcd_byte(0x01, LCD_CMD)
+    time.sleep(CLEAR_DELAY)
     lcd_string("Goodbye!",LCD_LINE_1,2)
     GPIO.cleanup()
@@ -13,11 +13,11 @@
 '''Python Modbus Monitor.
 
 Usage:
-    pymodmon.py
+    pymodmon.py [-v|--verbose]
     pymodmon.py [-h|--help]
     pymodmon.py [--version]
-    pymodmon.py -i <file>|--inifile=<file> [-l <file>|--logfile=<file>] [-L <sec>|--loginterval=<sec>] [-B <buf>|--logbuffer=<buf>] [-S|--single] [--nogui] [-D|--daily-log]
-    pymodmon.py --ip=<IP-address> --port=<port> --id=<id> --addr=<adr> --type=<TYPE> --format=<FORM> [-L <sec>|--loginterval=<sec>] [-B <buf>|--logbuffer=<buf>] [--descr=<"descr">] [--unit=<"unit">] [-S|--single] [-l <file>|--logfile=<file>]
+    pymodmon.py -i <file>|--inifile=<file> [-l <file>|--logfile=<file>] [--logformat=<fmt>] [-L <sec>|--loginterval=<sec>] [-B <buf>|--logbuffer=<buf>] [-S|--single] [--nogui] [-D|--daily-log] [-v|--verbose]
+    pymodmon.py --ip=<IP-address> --port=<port> --id=<id> --addr=<adr> --type=<TYPE> --format=<FORM> [-L <sec>|--loginterval=<sec>] [-B <buf>|--logbuffer=<buf>] [--descr=<"descr">] [--unit=<"unit">] [-S|--single] [-l <file>|--logfile=<file>] [--logformat=<fmt>] [-v|--verbose]
 
 Options:
     no options given in a xterm will open the TK interface
@@ -28,6 +28,10 @@ Options:
     -l, --logfile=<file>  Uses the given file as output for the retrieved data.
                           The data will be formatted in csv.
                           Existing files will be appended.
+    --logformat=<fmt>     Format of the log file: csv or feather.
+                          feather requires the pyarrow package and writes one
+                          file per log buffer, named <logfile>.<no>.feather
+                          [default: csv]
     --ip=<IP-address>     Use this as the IP address of the communication target
     --port=<port>         Port of the communication target
     --id=<id>             Modbus ID of the communication target
@@ -40,6 +44,7 @@ Options:
                           e.g. --descr="device name"
     --unit=<unit>         Unit of the retrieved data. e.g. --unit="V"
     -G, --nogui           Explicitly run without gui even when available
+    -v, --verbose         Show debug messages
     -S, --single          Do only one read cycle instead of continuous reading.
     -L, --loginterval=<sec>  Read data every xx seconds. [defaul value: 5]
     -B, --logbuffer=<buf> Read xx datasets before writing to disk.
@@ -51,29 +56,29 @@ Options:
                           "%Y-%m-%d" format.
 '''
 
-import tkinter as tk
 ## use docopt for command line parsing and displaying help message
 try:
     import docopt
 except ImportError:
-    try: ## for command line showerror does not work
-        tk.showerror('Import Error','docopt package was not found on your system.\nPlease install it using the command:\
-                                \n"pip install docopt"')
-    except:
-        print('Import errror. docopt package was not found on your system. Please install it using the command: "pip install docopt"')
+    ## tkinter is not loaded yet, so the message can only be printed
+    print('Import errror. docopt package was not found on your system. Please install it using the command: "pip install docopt"')
 from docopt import docopt
 if __name__ == '__main__':
     arguments = docopt(__doc__, version='PyModMon 1.0')
 
+## debug messages are only shown when requested with --verbose
+import logging
+log = logging.getLogger('pymodmon')
+log.addHandler(logging.StreamHandler())
+if __name__ == '__main__':
+    log.setLevel(logging.DEBUG if arguments['--verbose'] else logging.WARNING)
+
 ## use pymodbus for the Modbus communication
 try:
     from pymodbus import *
 except ImportError:
-    try: ## for command line showerror does not work
-        tk.showerror('Import Error','pymodbus package was not found on your system.\nPlease install it using the command:\
-                                \n"pip install pymodbus"')
-    except:
-        print('Import errror. pymodbus package was not found on your system. Please install it using the command: "pip install pymodbus"')
+    ## tkinter is not loaded yet, so the message can only be printed
+    print('Import errror. pymodbus package was not found on your system. Please install it using the command: "pip install pymodbus"')
 
 ## pymodbus changed its API with version 3.1, so we need to know what version we are importing
 import pymodbus as pm
@@ -83,15 +88,58 @@ pymodbus_version = "≥3"
 if pkg_resources.parse_version(pm_version) < pkg_resources.parse_version("3.0.0"):
     pymodbus_version = "legacy"
 
+## the client class moved with the API change as well
+if pymodbus_version == "legacy":
+    from pymodbus.client.sync import ModbusTcpClient as ModbusClient
+else:
+    from pymodbus.client import ModbusTcpClient as ModbusClient
+
 ## enable execution of functions on program exit    
 import atexit
 
 ## enable timed execution of the data polling
-from threading import Timer
+import threading
+
+## hand over GUI updates from the polling thread to the Tk thread
+import queue
 
 ## enable file access
 import os
 
+## buffer for the polled data, appended by the polling thread and emptied by the log writer
+from collections import deque
+
+## time stamps for logged data and daily log files
+import datetime
+import time
+
+## parsing of the data table in configuration files
+import json
+import ast
+
+## enable tuning of the Modbus TCP connection
+import socket
+
+## decoding of the received register data
+import struct
+import array
+import sys
+
+## caching of input checks
+from functools import lru_cache
+
+## reading and writing of configuration and log files
+import configparser
+import csv
+import io ## required for correct writing of utf-8 characters
+
+## pyarrow is only needed for logging in feather format
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:
+    pyarrow = None
+
 ## class for all data related things
 #
 class Data(object):
@@ -100,11 +148,14 @@ class Data(object):
         self.inifilename = None
         self.logfilename = None
         self.logmaxbuffer = 50          ## how many records will be buffered before writing to file
+        self.logformat = 'csv'          ## file format of the log file, 'csv' or 'feather'
+        self.dailylog = False           ## write a log file for each day
         self.ipaddress = '10.0.0.42'    ## address of the communication target
         self.portno =   502             ## port number of the target
         self.modbusid = 3               ## bus ID of the target
         self.manufacturer = 'Default Manufacturer' ## arbitrary string for user conveniance
         self.loginterval = 5            ## how often should data be pulled from target in seconds
+        self.readmaxgap = 0             ## unused registers allowed between datasets read with one request
         self.moddatatype = {            ## allowed data types, sent from target
                 'S32':2,
                 'U32':2,
@@ -119,10 +170,22 @@ class Data(object):
 
         ## table of data to be pulled from target
         self.datasets = [['address','type','format','description','unit','value']]
+        self.datasetsversion = 0    ## changes with every change of datasets, see datasetsChanged()
 
         self.datavector = []        ## holds the polled data from target
-        self.databuffer = []        ## holds the datavectors before writing to disk
-        self.datawritebuffer = []   ## holds a copy of databuffer for actual writing to disk
+        self.databuffer = deque()   ## holds the datavectors before writing to disk
+
+    ## has to be called after every change of datasets or readmaxgap,
+    #  data derived from them (e.g. the read plan) is then rebuilt when needed
+    def datasetsChanged(self):
+        self.datasetsversion += 1
+
+    ## replaces the datasets while the polling thread may be reading them
+    #   the list is never changed in place, a poll works on the list it got and the new
+    #   list is in place before the version changes
+    def setDatasets(self,datasets):
+        self.datasets = datasets
+        self.datasetsChanged()
 
 ## class that contains all IO specifics
 class Inout:
@@ -132,6 +195,58 @@ class Inout:
     MIN_SIGNED   = -2147483648
     MAX_UNSIGNED =  4294967295
 
+    ## maximum number of registers that can be read with one Modbus request
+    MAX_READ_COUNT = 125
+
+    ## how many full log buffers are kept while the log file cannot be opened,
+    #  older rows are dropped
+    LOG_KEEP_BUFFERS = 10
+
+    ## seconds to wait before reconnecting after a lost connection, doubled after each
+    #  failed attempt up to the maximum
+    RECONNECT_DELAY     = 1
+    RECONNECT_MAX_DELAY = 60
+
+    ## big endian struct formats for the numeric data types, data types not listed are
+    #  interpreted as U16. string types (STR32, STR24) are decoded from their bytes.
+    TYPE_FORMATS = {
+            'S32':   struct.Struct('>i'),
+            'U32':   struct.Struct('>I'),
+            'U64':   struct.Struct('>Q'),
+            'S16':   struct.Struct('>h'),
+            'U16':   struct.Struct('>H')
+            }
+    STRING_TYPES = ('STR32', 'STR24')
+
+    ## divisors for the fixed point data formats, other formats are used as received
+    FORMAT_DIVISORS = {
+            'FIX3': 1000,
+            'FIX2': 100,
+            'FIX1': 10
+            }
+
+    def __init__(self):
+        self._read_plan = []        ## grouped register reads, see _build_read_plan
+        self._read_plan_version = -1  ## data.datasetsversion the read plan was built for
+        self._read_plan_rows = 0    ## number of datasets the read plan was built for
+        self._read_failed = set()   ## addresses of failed reads that were already reported
+        self._logfile = None        ## log file kept open by writeLoggerDataFile
+        self._logfilename = None    ## name of the currently open log file
+        self._header = ''           ## log file header, see _getLoggerHeader
+        self._last_vector = None    ## data.datavector last sent to the GUI
+        self._header_version = -1   ## data.datasetsversion the header was built for
+        self._numeric = False       ## logged rows hold only numbers, see _numericRows
+        self._numeric_version = -1  ## data.datasetsversion _numeric was checked for
+        self._unwritten = []        ## rows kept while the log file cannot be opened
+        self._log_failed = False    ## a log file error was reported, see _reportLogError
+        self._schema = None         ## feather column schema, see _getFeatherSchema
+        self._schema_version = -1   ## data.datasetsversion the schema was built for
+        self._feather_base = None   ## log file name without extension of the feather files
+        self._feather_no = 0        ## number of the next feather file
+        self._reconnect_at = 0      ## time.monotonic() before which no reconnect is tried
+        self._reconnect_delay = self.RECONNECT_DELAY
+        self._thread = None         ## communication thread, None while not communicating
+
     ## function for testing the per command line specified configuration file
     def checkImportFile(self):
         ## does the file exist?
@@ -139,65 +254,76 @@ class Inout:
             inifile = open(str(arguments['--inifile']),'r').close()
             data.inifilename = str(arguments['--inifile'])
         except:
-            ## if we have a GUI display an error dialog
-            try:
-                tk.showerror('Import Error','The specified configuration file was not found.')
+            ## if we have a GUI display an error dialog, if not display error and exit
+            self._showError('Import Error','The specified configuration file was not found.',
+                            'Configuration file error. A file with that name seems not to exist, please check.')
+            if (gui_active):
                 return
-            except: ## if no GUI display error and exit
-                print('Configuration file error. A file with that name seems not to exist, please check.')
-                exit()
+            sys.exit(1)
         try:
             inout.readImportFile()
         except:
-            try:
-                tk.showerror('Import Error','Could not read the configuration file. Please check file path and/or file.')
+            self._showError('Import Error','Could not read the configuration file. Please check file path and/or file.',
+                            'Could not read configuration file. Please check file path and/or file.')
+            if (gui_active):
                 return
-            except:
-                print('Could not read configuration file. Please check file path and/or file.')
-                exit()
+            sys.exit(1)
 
     ## function for acually reading input configuration file
+    #   returns (communication settings changed, datasets changed)
     def readImportFile(self):
         ## read config data from file
-        import configparser
         Config = configparser.ConfigParser()
         ## read the config file
         Config.read(data.inifilename, encoding="utf-8")
+        ## remember the current settings to tell the caller what was changed by the file
+        oldcommsettings = (data.ipaddress, data.portno, data.modbusid, data.manufacturer, data.loginterval)
+        olddatasets = data.datasets
+        oldreadmaxgap = data.readmaxgap
         data.ipaddress     = Config.get('CommSettings','IP address')
         data.portno        = int(Config.get('CommSettings','port number'))
         data.modbusid      = int(Config.get('CommSettings','Modbus ID'))
         data.manufacturer  = Config.get('CommSettings','manufacturer')
         data.loginterval   = int(Config.get('CommSettings','logger interval'))
+        try: ## older configuration files do not have this setting
+            data.readmaxgap = int(Config.get('CommSettings','read max gap'))
+        except:
+            data.readmaxgap = 0
         try: ## logfilename may be empty. if so data will printed to terminal
             data.logfilename   = Config.get('FileSettings','log file')
         except:
             data.logfilename = None
         data.logmaxbuffer  = int(Config.get('FileSettings','log buffer'))
-        data.datasets      = eval(Config.get('TargetDataSettings','data table'))
+        datatable          = Config.get('TargetDataSettings','data table')
+        try:
+            data.datasets  = json.loads(datatable)
+        except ValueError: ## configuration files of older versions use Python syntax for the table
+            data.datasets  = ast.literal_eval(datatable)
+
+        commchanged = (oldcommsettings != (data.ipaddress, data.portno, data.modbusid, data.manufacturer, data.loginterval))
+        datasetschanged = (olddatasets != data.datasets)
+        ## the read plan depends on the datasets and on the allowed gap between their registers
+        if (datasetschanged or (oldreadmaxgap != data.readmaxgap)):
+            data.datasetsChanged()
+        return (commchanged, datasetschanged)
 
     ## function for actually writing configuration data
     #
     def writeExportFile(self):
-        import io ## required for correct writing of unicode characters to file
         ## use ini file capabilities
-        import configparser
         Config = configparser.ConfigParser()
 
         ## if the dialog was closed with no file selected ('cancel') just return
         if (data.inifilename == None):
-            try: ## if running in command line no window can be displayed
-                tk.showerror('Configuration File Error','no file name given, please check.')
-            except:
-                print('Configuration file error, no file name given, please check.')
+            self._showError('Configuration File Error','no file name given, please check.',
+                            'Configuration file error, no file name given, please check.')
             return
         ## write the data to the selected config file
         try:
             inifile = io.open(data.inifilename,'w',encoding="utf-8")
         except:
-            try: ## if running in command line no window can be displayed
-                tk.showerror('Configuration File Error','a file with that name seems not to exist, please check.')
-            except:
-                print('Configuration file error, a file with that name seems not to exist, please check.')
+            self._showError('Configuration File Error','a file with that name seems not to exist, please check.',
+                            'Configuration file error, a file with that name seems not to exist, please check.')
             gui.selectExportFile()
             return
 
@@ -208,11 +334,12 @@ class Inout:
         Config.set('CommSettings','Modbus ID',str(data.modbusid))
         Config.set('CommSettings','manufacturer',str(data.manufacturer))
         Config.set('CommSettings','logger interval',str(data.loginterval))
+        Config.set('CommSettings','read max gap',str(data.readmaxgap))
         Config.add_section('FileSettings')
         Config.set('FileSettings','log file',str(data.logfilename))
         Config.set('FileSettings','log buffer',str(data.logmaxbuffer))
         Config.add_section('TargetDataSettings')
-        Config.set('TargetDataSettings','data table',str(data.datasets))
+        Config.set('TargetDataSettings','data table',json.dumps(data.datasets, ensure_ascii=False))
         
         Config.write(inifile)
         inifile.close()
@@ -221,33 +348,23 @@ class Inout:
     #  checks if it is an existing file with data in it and will append then
     #  this function should only be called in intervals writing data in bulk (e.g. every 5 minutes)
     #  to prevent wearout on solid state disks like SD CARDs
+    #  writes the given rows, or all rows in the data buffer if no rows are given
     #
-    def writeLoggerDataFile(self):
-        import csv      ## for writing in csv format
-        import datetime ## for daily log option
-        import io       ## required for correct writing of utf-8 characters
+    def writeLoggerDataFile(self,rows=None):
+        if (rows == None):
+            rows = self._takeBufferedData()
 
         if (data.logfilename == None): ## when no filename is given, print data to terminal
-            if len(data.datawritebuffer) > 0: ## if the buffer has data write this to terminal
-                    print(data.datawritebuffer)
-                    data.datawritebuffer = [] ## empty buffer
-            else: ## we asume that this was called outside the poll loop with buffer size not reached
-                    print(data.databuffer)
-                    if (len(data.databuffer) == 1): ## if only one address was provided via command line
-                        print(data.databuffer[0][0],data.datasets[1][3],data.databuffer[0][1],data.datasets[1][4])
-                    data.databuffer = [] ## empty buffer
+            print(rows)
+            if (len(rows) == 1): ## if only one address was provided via command line
+                print(rows[0][0],data.datasets[1][3],rows[0][1],data.datasets[1][4])
             return
 
         thislogfile = data.logfilename  ## store filename locally for daily option
         thisdate = str(datetime.date.today())
-        gui_checked_daily = 0
 
-        ## is GUI available or is command line mode active
-        if (gui_active):
-            gui_checked_daily = int(gui.checked_daily.get())
-
-        ## if daily option is active
-        if ( (arguments['--daily-log'] == True) or (gui_checked_daily) ):
+        ## if daily option is active (set by command line or GUI, this runs outside of the Tk thread)
+        if (data.dailylog):
             ## assumption: the logfile has a file extension
             logfileparts = thislogfile.rpartition('.')
 
@@ -259,208 +376,505 @@ class Inout:
                 ## format the new logfilename with current date included
                 thislogfile = logfileparts[0]+'_'+thisdate+logfileparts[1]+logfileparts[2]
 
-        ## try to open the file. if it does not exist, create it on the way
-        try:
-            open(thislogfile, 'a').close()
-        except:
-            try: ## if running in command line no window can be displayed
-                tk.showerror('Log File Error','file cannot be accessed, please check.')
-            except:
-                print('Log file error. File cannot be accessed, please check.')
+        ## feather log files are written as a whole for each flush of the buffer
+        if (data.logformat == 'feather'):
+            self._writeFeatherFile(thislogfile,rows)
             return
 
+        ## the log file is kept open between writes and is only (re)opened when
+        #  the file name changes, e.g. when a new day starts with the daily log option,
+        #  or when the file was moved away or deleted, e.g. by logrotate
+        ## rows that could not be written last time come first
+        if self._unwritten:
+            rows = self._unwritten + rows
+            self._unwritten = []
+        if ((thislogfile != self._logfilename) or self._logfileReplaced()):
+            self.closeLoggerDataFile()
+            ## try to open the file. if it does not exist, create it on the way
+            try:
+                self._logfile = io.open(thislogfile,'at', encoding="utf-8", buffering=1<<20)
+            except:
+                self._reportLogError('file cannot be accessed, please check.',
+                                     'Log file error. File cannot be accessed, please check.')
+                ## keep the newest rows for the next try
+                self._unwritten = rows[-self.LOG_KEEP_BUFFERS*data.logmaxbuffer:]
+                return
+            self._logfilename = thislogfile
+
+            ## check if the file is empty, if so write the header information to the file
+            if os.fstat(self._logfile.fileno()).st_size==0:
+                self._logfile.write(self._getLoggerHeader())
 
-        ## check if the file is empty, if so write the header information to the file
-        if os.stat(thislogfile).st_size==0:
-            with io.open(thislogfile,'at', encoding="utf-8") as logfile:
-                logwriter = csv.writer(logfile, quoting=csv.QUOTE_ALL)
-                ## ensure UTF8 encoding while writing
-                ## print out what data is contained and whats its format
-                for thisrow in data.datasets:
-                    logwriter.writerows([thisrow])
-
-                logfile.write('-'*50+'\n') ## write a separator
-                ## format the column headers
-                columnheader = 'time'
-                for thisrow in data.datasets[1:]: ## omit first row containing 'address'
-                    ## ensure UTF8 encoding while writing, since this is the column heading
-                    #  no problem with converting to string even if stored as int
-                    thisrow = [s.encode('utf-8') for s in thisrow]
-                    ## use description field for columnheader if filled
-                    if (thisrow[3] != ''):
-                        thisdescription = ','+str(thisrow[3])
-                        ## if a unit is entered add it after the description
-                        if (thisrow[4] != ''):
-                            thisdescription += ' ('+str(thisrow[4])+')'
-                        columnheader += thisdescription
-                    else: ## no description, use address as header
-                        columnheader += ', '+str(thisrow[0])
-
-                columnheader += '\n' ## line break before data rows
-                logfile.write(columnheader)
-        
         ## if the file is not empty we assume an append write to the file
-        if len(data.datawritebuffer) > 0: ## if the buffer has data write this to disk
-            with open(thislogfile,'at') as logfile:
-                logwriter = csv.writer(logfile)
-                logwriter.writerows(data.datawritebuffer)
-                data.datawritebuffer = [] ## empty buffer
-        else: ## we asume that this was called outside the poll loop with buffer size not reached
-            with open(thislogfile,'at') as logfile:
-                logwriter = csv.writer(logfile)
-                logwriter.writerows(data.databuffer)
-                data.databuffer = [] ## empty buffer
+        if self._numericRows():
+            ## time stamps and numbers never need quoting, so the rows are joined directly
+            #  in the same format the csv writer would use
+            self._logfile.write(''.join([','.join(['' if value is None else str(value) for value in row])+'\r\n'
+                                         for row in rows]))
+        else:
+            logwriter = csv.writer(self._logfile)
+            logwriter.writerows(rows)
+        ## hand all buffered rows to the file system at once
+        self._logfile.flush()
+        self._log_failed = False
+
+    ## function for checking if the logged rows only hold numbers (besides the time stamp)
+    #   the check is only repeated when the datasets changed since the last call
+    def _numericRows(self):
+        if (self._numeric_version != data.datasetsversion):
+            self._numeric = all((thisrow[1] not in self.STRING_TYPES) for thisrow in data.datasets[1:])
+            self._numeric_version = data.datasetsversion
+        return self._numeric
+
+    ## function for the header of a new log file
+    #   the header is only rebuilt when the datasets changed since the last call
+    def _getLoggerHeader(self):
+        if (self._header_version != data.datasetsversion):
+            self._header = self._build_header(data.datasets)
+            self._header_version = data.datasetsversion
+        return self._header
+
+    ## function for building the header text of the log file
+    #   lists the datasets with their format, a separator and the column headers
+    def _build_header(self,datasets):
+        header = io.StringIO()
+        logwriter = csv.writer(header, quoting=csv.QUOTE_ALL)
+        ## print out what data is contained and whats its format
+        logwriter.writerows(datasets)
+
+        header.write('-'*50+'\n') ## write a separator
+        ## format the column headers
+        columnheader = ['time']
+        for thisrow in datasets[1:]: ## omit first row containing 'address'
+            ## use description field for columnheader if filled
+            #  no problem with converting to string even if stored as int
+            if (thisrow[3] != ''):
+                thisdescription = ','+str(thisrow[3])
+                ## if a unit is entered add it after the description
+                if (thisrow[4] != ''):
+                    thisdescription += ' ('+str(thisrow[4])+')'
+                columnheader.append(thisdescription)
+            else: ## no description, use address as header
+                columnheader.append(', '+str(thisrow[0]))
+
+        columnheader.append('\n') ## line break before data rows
+        header.write(''.join(columnheader))
+        return header.getvalue()
+
+    ## function for writing the buffered data to a new feather file
+    #   the files are numbered, e.g. log.0.feather, log.1.feather for log.csv
+    def _writeFeatherFile(self,thislogfile,rows):
+        if (len(rows) == 0):
+            return
+
+        logfileparts = thislogfile.rpartition('.')
+        thisbase = logfileparts[0] or logfileparts[2] ## the name may have no extension
+        if (thisbase != self._feather_base):
+            self._feather_base = thisbase
+            self._feather_no = 0
+        ## never overwrite files of an earlier run
+        while os.path.exists('%s.%d.feather' % (self._feather_base, self._feather_no)):
+            self._feather_no += 1
+
+        schema = self._getFeatherSchema()
+        try:
+            columns = [pyarrow.array(column, type=field.type) for column, field in zip(zip(*rows), schema)]
+            pyarrow.feather.write_feather(pyarrow.Table.from_arrays(columns, schema=schema),
+                                          '%s.%d.feather' % (self._feather_base, self._feather_no),
+                                          compression='uncompressed')
+        except Exception as error:
+            self._reportLogError('feather file cannot be written: '+str(error))
+            return
+        self._feather_no += 1
+        self._log_failed = False
+
+    ## function for the column schema of feather log files
+    #   the schema is only rebuilt when the datasets changed since the last call
+    def _getFeatherSchema(self):
+        if (self._schema_version != data.datasetsversion):
+            fields = [pyarrow.field('time', pyarrow.string())]
+            for thisrow in data.datasets[1:]: ## omit first row containing 'address'
+                if (thisrow[1] in self.STRING_TYPES):
+                    thistype = pyarrow.string()
+                elif (thisrow[2] in self.FORMAT_DIVISORS):
+                    thistype = pyarrow.float64()
+                elif (thisrow[1] == 'U64'):
+                    thistype = pyarrow.uint64()
+                else:
+                    thistype = pyarrow.int64()
+                ## same column names as in the csv header
+                thisname = str(thisrow[3]) or str(thisrow[0])
+                if (thisrow[3] != '') and (thisrow[4] != ''):
+                    thisname += ' ('+str(thisrow[4])+')'
+                fields.append(pyarrow.field(thisname, thistype))
+            self._schema = pyarrow.schema(fields)
+            self._schema_version = data.datasetsversion
+        return self._schema
+
+    ## function for emptying the data buffer
+    #   returns the buffered rows, rows appended by the polling thread meanwhile stay
+    #   in the buffer for the next write
+    def _takeBufferedData(self):
+        return [data.databuffer.popleft() for i in range(len(data.databuffer))]
+
+    ## function for checking if the open log file is still the one at its path
+    #
+    def _logfileReplaced(self):
+        try:
+            return os.stat(self._logfilename).st_ino != os.fstat(self._logfile.fileno()).st_ino
+        except OSError: ## no file at the path anymore
+            return True
+
+    ## function for making sure the logged data is stored on the disk
+    #   only done when the communication stops, to spare flash memory
+    def syncLoggerDataFile(self):
+        if (self._logfile != None):
+            try:
+                self._logfile.flush()
+                os.fsync(self._logfile.fileno())
+            except OSError as error:
+                self._showError('Log File Error','log data cannot be written: '+str(error))
+
+    ## function for closing the log file kept open by writeLoggerDataFile
+    #
+    def closeLoggerDataFile(self):
+        if (self._logfile != None):
+            try:
+                self._logfile.close()
+            except OSError: ## data still buffered cannot be written, e.g. on a full disk
+                pass
+        self._logfile = None
+        self._logfilename = None
 
     ## function for starting communication with target
     #
     def runCommunication(self):
-        ## pymodbus changed its API with >= 3.1. so we need to check what needs to be called
-        if pymodbus_version == "legacy":
-            from pymodbus.client.sync import ModbusTcpClient as ModbusClient
-        else:
-            from pymodbus.client import ModbusTcpClient as ModbusClient
+        if (self._thread != None): ## already communicating, never start a second polling thread
+            return
 
+        ## the connection is kept open for all polls until stopCommunication
         self.client = ModbusClient(host=data.ipaddress, port=data.portno)
+        self._reconnect_at = 0
+        self._reconnect_delay = self.RECONNECT_DELAY
+        self._last_vector = None ## always show the first poll
+
+        ## full buffers are written to disk by a separate thread, so a slow disk does
+        #  not delay the polls. at most 4 buffers wait, then the polling thread waits too
+        self._write_queue = queue.Queue(maxsize=4)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+        ## one long living thread connects and polls the target until stopCommunication
+        #  sets the event, so a slow or missing target never blocks the caller
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+
+    ## function run by the communication thread
+    #   polls the target right away and then every data.loginterval seconds,
+    #   the client stays connected between the polls
+    def _run_loop(self):
+        if not self._connect():
+            self._showError('Modbus Connection Error','could not connect to target. Check your settings, please.',
+                            'Modbus connection error. Could not connect to target. Check your settings, please.')
+        ## polls are scheduled on a fixed grid, the time a poll takes does not add up
+        #  if polls were missed because one took too long, continue with the next due slot
+        nextpoll = time.monotonic()
+        while True:
+            ## an unexpected error in one poll must not end the polling thread
+            try:
+                self.pollTargetData()
+            except Exception as error:
+                thisdate = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                self._showError('Poll Error',thisdate + ': Polling the target failed: ' + str(error))
+            nextpoll += data.loginterval
+            now = time.monotonic()
+            if (nextpoll < now):
+                nextpoll += ((now - nextpoll) // data.loginterval + 1) * data.loginterval
+            if self._stop.wait(nextpoll - now):
+                break
+
+    ## function run by the log writer thread
+    #   writes the handed over buffers until it gets None
+    def _write_loop(self):
+        while True:
+            rows = self._write_queue.get()
+            if (rows == None):
+                break
+            self._writeLogData(rows)
+
+    ## function for writing log data without letting write errors end the caller
+    #   e.g. on a full disk the error is reported and the rows are dropped, the file is
+    #   opened again with the next write
+    def _writeLogData(self,rows=None):
         try:
-            self.client.connect()
+            self.writeLoggerDataFile(rows)
+        except Exception as error:
+            self.closeLoggerDataFile()
+            self._reportLogError('log data cannot be written: '+str(error))
+
+    ## function for reporting log file errors
+    #   only the first error is shown until data was written successfully again,
+    #   so a missing or full disk does not raise an error for every log buffer
+    def _reportLogError(self,message,consolemessage=None):
+        if not self._log_failed:
+            self._log_failed = True
+            self._showError('Log File Error',message,consolemessage)
+
+    ## function for showing errors
+    #   in the GUI a message box is shown, errors of other threads are handed over to
+    #   the Tk thread. in command line mode the console message is printed
+    def _showError(self,title,message,consolemessage=None):
+        if (gui_active):
+            if (threading.current_thread() is threading.main_thread()):
+                messagebox.showerror(title, message)
+            else:
+                gui.post(messagebox.showerror, title, message)
+        else:
+            print(consolemessage or message)
+
+    ## function for (re)connecting the client to the target
+    #   on failure the next attempt is delayed, the delay doubles with every failed attempt
+    #   returns True if the client is connected
+    def _connect(self):
+        try:
+            connected = self.client.connect()
         except:
-            tk.showerror('Modbus Connection Error','could not connect to target. Check your settings, please.')
-        
-        self.pollTargetData()
+            connected = False
+        if connected:
+            ## send the small Modbus requests immediately instead of letting Nagle's algorithm hold them back
+            if (getattr(self.client, 'socket', None) is not None):
+                self.client.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._reconnect_delay = self.RECONNECT_DELAY
+        else:
+            self._reconnect_at = time.monotonic() + self._reconnect_delay
+            self._reconnect_delay = min(self._reconnect_delay * 2, self.RECONNECT_MAX_DELAY)
+        return connected
 
-        self.client.close()
-        ## lambda: is required to not spawn hundreds of threads but only one that calls itself
-        self.commtimer = Timer(data.loginterval, lambda: self.runCommunication())
-        self.commtimer.start() ## needs to be a separate command else the timer is not cancel-able
+    ## function for keeping the main thread alive while the communication thread polls
+    #   used in command line mode, the timeout lets Ctrl+C through while waiting
+    def waitCommunication(self):
+        while (self._thread != None) and self._thread.is_alive():
+            self._thread.join(1)
 
     def stopCommunication(self):
-        #print('Stopped Communication')
-        self.commtimer.cancel()
-        ## flush data buffer to disk
-        self.writeLoggerDataFile()
+        if (self._thread == None): ## not communicating, nothing to stop
+            return
+        log.debug('Stopped Communication')
+        self._stop.set()
+        if (self._thread is not threading.current_thread()):
+            self._thread.join()
+        self.client.close()
+        ## let the log writer finish the handed over buffers, then flush data buffer to disk
+        if self._writer.is_alive():
+            self._write_queue.put(None)
+            self._writer.join()
+        self._writeLogData()
+        self.syncLoggerDataFile()
+        self._thread = None
     
+    ## function for grouping the datasets into as few read requests as possible
+    #   datasets whose registers follow each other (with at most data.readmaxgap unused
+    #   registers in between) are read with one request of at most MAX_READ_COUNT registers.
+    #   returns a list of (address, count, fields), where fields holds for each dataset
+    #   (index in datasets, byte offset in the read data, byte count, struct format or None
+    #   for strings, divisor or None)
+    #
+    def _build_read_plan(self,datasets):
+        ## rows with an invalid address or data type are reported and not read, their value stays None
+        rows = []
+        for index, thisrow in enumerate(datasets):
+            try:
+                address = int(thisrow[0])
+                count = data.moddatatype[thisrow[1]]
+                if (address < 0):
+                    raise ValueError
+            except (ValueError, TypeError, KeyError, IndexError):
+                self._showError('Dataset Error','dataset %s is invalid and will not be read, please check address and type.'
+                                % (thisrow,))
+                continue
+            rows.append((address, count, index, thisrow))
+
+        plan = []
+        for address, count, index, thisrow in sorted(rows, key=lambda row: row[0]):
+            if thisrow[1] in self.STRING_TYPES:
+                unpacker = None
+            else:
+                unpacker = self.TYPE_FORMATS.get(thisrow[1], self.TYPE_FORMATS['U16'])
+            divisor = self.FORMAT_DIVISORS.get(thisrow[2])
+            if plan:
+                base, end, fields = plan[-1]
+                ## append to the current request if the registers are close enough and the request does not get too big
+                if ((address <= end + data.readmaxgap) and (max(end, address+count) - base <= self.MAX_READ_COUNT)):
+                    fields.append((index, 2*(address-base), 2*count, unpacker, divisor))
+                    plan[-1] = (base, max(end, address+count), fields)
+                    continue
+            plan.append((address, address+count, [(index, 0, 2*count, unpacker, divisor)]))
+
+        ## convert the end address of each request to the number of registers to read
+        return [(base, end-base, fields) for (base, end, fields) in plan]
+
     ## function for polling data from the target and triggering writing to log file if set
     #
     def pollTargetData(self):
-        from pymodbus.payload import BinaryPayloadDecoder
-        from pymodbus.constants import Endian
-        import datetime
-
         data.datavector = [] ## empty datavector for current values
 
-        ## request each register from datasets, omit first row which contains only column headers
-        for thisrow in data.datasets[1:]:
+        ## after a lost connection skip the polls until the next reconnect attempt is due
+        if not self.client.is_socket_open():
+            if (time.monotonic() < self._reconnect_at) or not self._connect():
+                return
+
+        ## the read plan only changes when the datasets change
+        #  the version is read before the datasets, they are replaced before the version changes
+        thisversion = data.datasetsversion
+        if (self._read_plan_version != thisversion):
+            datasets = data.datasets[1:]
+            self._read_plan = self._build_read_plan(datasets)
+            self._read_plan_rows = len(datasets)
+            self._read_plan_version = thisversion
+            self._read_failed = set()
+
+        ## data of each dataset in order of the datasets the plan was built for,
+        #  first row with column headers omitted
+        values = [None] * self._read_plan_rows
+
+        ## request each group of registers from the read plan
+        for (address, count, fields) in self._read_plan:
             ## if the connection is somehow not possible (e.g. target not responding)
             #  show a error message instead of excepting and stopping
             try:
                 if pymodbus_version == "legacy":
-                    received = self.client.read_input_registers(address = int(thisrow[0]),
-                                                        count = data.moddatatype[thisrow[1]],
+                    received = self.client.read_input_registers(address = address,
+                                                        count = count,
                                                         unit = data.modbusid)
                 else:
-                    received = self.client.read_input_registers(address = int(thisrow[0]),
-                                                        count = data.moddatatype[thisrow[1]],
+                    received = self.client.read_input_registers(address = address,
+                                                        count = count,
                                                         slave = data.modbusid)
 
             except:
-                thisdate = str(datetime.datetime.now()).partition('.')[0]
+                ## drop the connection, the next poll reconnects
+                self.client.close()
+                thisdate = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 thiserrormessage = thisdate + ': Connection not possible. Check settings or connection.'
-                if (gui_active):
-                    messagebox.showerror('Connection Error',thiserrormessage)
-                    return  ## prevent further execution of this function
+                self._showError('Connection Error',thiserrormessage)
+                return  ## prevent further execution of this function
+
+            ## the target may answer with an exception (e.g. illegal address) or less registers
+            #  than requested, the values of this request then stay None
+            #  each failing address is only reported once until it was read or the datasets change
+            if received.isError() or (len(received.registers) < count):
+                if (address not in self._read_failed):
+                    self._read_failed.add(address)
+                    thisdate = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    self._showError('Read Error',thisdate + ': Reading %d registers from address %d failed: %s'
+                                    % (count, address, received))
+                continue
+            self._read_failed.discard(address)
+
+            ## raw big endian bytes of all registers of this request
+            registerdata = array.array('H', received.registers)
+            if (sys.byteorder == 'little'):
+                registerdata.byteswap()
+            registerdata = registerdata.tobytes()
+            for (index, offset, size, unpacker, divisor) in fields:
+                ## provide the correct result depending on the defined datatype
+                if unpacker is None: ## convert bytes to str
+                    interpreted = registerdata[offset:offset+size].decode("utf-8", errors="replace").strip('\x00')
                 else:
-                    print(thiserrormessage)
-                    return  ## prevent further execution of this function
-
-            message = BinaryPayloadDecoder.fromRegisters(received.registers, byteorder=Endian.BIG, wordorder=Endian.BIG)
-            ## provide the correct result depending on the defined datatype
-            if thisrow[1] == 'S32':
-                interpreted = message.decode_32bit_int()
-            elif thisrow[1] == 'U32':
-                interpreted = message.decode_32bit_uint()
-            elif thisrow[1] == 'U64':
-                interpreted = message.decode_64bit_uint()
-            elif thisrow[1] == 'STR32':
-                interpreted = message.decode_string(32).decode("utf-8").strip('\x00') ## convert bytes to str
-            elif thisrow[1] == 'STR24': ## workaround when SMA shorted the length of a string register to 24 bytes
-                interpreted = message.decode_string(24).decode("utf-8").strip('\x00') ## convert bytes to str
-            elif thisrow[1] == 'S16':
-                interpreted = message.decode_16bit_int()
-            elif thisrow[1] == 'U16':
-                interpreted = message.decode_16bit_uint()
-            else: ## if no data type is defined do raw interpretation of the delivered data
-                interpreted = message.decode_16bit_uint()
-
-            ## check for "None" data before doing anything else
-            if ((interpreted == self.MIN_SIGNED) or (interpreted == self.MAX_UNSIGNED)):
-                displaydata = None
-            else:
-                ## put the data with correct formatting into the data table
-                if thisrow[2] == 'FIX3':
-                    displaydata = float(interpreted) / 1000
-                elif thisrow[2] == 'FIX2':
-                    displaydata = float(interpreted) / 100
-                elif thisrow[2] == 'FIX1':
-                    displaydata = float(interpreted) / 10
-
+                    interpreted = unpacker.unpack_from(registerdata, offset)[0]
+
+                ## check for "None" data before doing anything else
+                if ((interpreted == self.MIN_SIGNED) or (interpreted == self.MAX_UNSIGNED)):
+                    displaydata = None
+                elif divisor:
+                    ## put the data with correct formatting into the data table
+                    displaydata = float(interpreted) / divisor
                 else:
                     displaydata = interpreted
 
-            ## save _scaled_ data in datavector for further handling
-            data.datavector.append(displaydata)
+                ## save _scaled_ data for further handling
+                values[index] = displaydata
+
+        data.datavector = values
+
+        ## display collected data, unchanged values are already on display
+        if ((gui_active == 1) and (data.datavector != self._last_vector)):
+            self._last_vector = data.datavector
+            gui.post(gui.updateLoggerDisplay) ## Tk may only be used from its own thread
 
-        ## display collected data
-        if (gui_active == 1):
-            gui.updateLoggerDisplay()
+        self.appendLoggerSample()
 
-        ## for logging purposes we need a time stamp first
-        stampedvector = []
-        ## we don't need the microseconds of the date return value, so we strip it
-        stampedvector.append(str(datetime.datetime.now()).partition('.')[0])
-        stampedvector += data.datavector
+    ## function for adding the current data to the log buffer
+    #   full buffers are handed over to the log writer thread
+    def appendLoggerSample(self):
+        ## for logging purposes we need a time stamp first, without microseconds
+        stampedvector = [datetime.datetime.now().isoformat(' ', timespec='seconds')]
+        stampedvector.extend(data.datavector)
         data.databuffer.append(stampedvector)
-        #print data.databuffer
         ## is the buffer large enough to be written to file system?
         if (len(data.databuffer) >= data.logmaxbuffer):
-            ## ensure that the data to write will not be altered by faster poll cycles
-            data.datawritebuffer = data.databuffer
-            data.databuffer = [] ## empty the buffer
-            self.writeLoggerDataFile() ## call write routine to save data on disk
+            ## hand over to the log writer thread, waits while the writer is busy with older buffers
+            rows = self._takeBufferedData()
+            while True:
+                try:
+                    self._write_queue.put(rows, timeout=1)
+                    break
+                except queue.Full:
+                    if not self._writer.is_alive(): ## never wait for a writer that is gone
+                        self._showError('Log File Error','the log writer has stopped, log data is lost.')
+                        break
 
     ## function adds dataset to the datasets list
     #   also updates the displayed list
     #   new datasets are not added to the config file
     #
     def addDataset(self,inputdata):
-        data.datasets.append(inputdata)
-        print('Current datasets: '),(data.datasets)
+        data.setDatasets(data.datasets + [inputdata])
+        log.debug('Current datasets: %s', data.datasets)
 
     ## function for saving program state at program exit
     #
     def cleanOnExit(self):
-        try: ## stop data logging on exit, catch a possible exception, when communication is not running
-            self.stopCommunication()
-        except:
-            print('')
+        ## stop data logging on exit, does nothing if already stopped (e.g. after a single run)
+        self.stopCommunication()
 
         ## if data is available, write polled data from buffer to disk
         if len(data.databuffer):
-            self.writeLoggerDataFile()
+            self._writeLogData()
+        self.closeLoggerDataFile()
         print('PyModMon has exited cleanly.')
 
     ## function for printing the current configuration settings
     #   only used for debug purpose
     #
     def printConfig(self):
-        counter = 0
-        for data in data.datasets:
-            print('Datasets in List:', counter, data)
-            counter += 1
+        for counter, thisrow in enumerate(data.datasets):
+            print('Datasets in List:', counter, thisrow)
+
+## function for checking for seemingly correct IP address input
+#   raises ValueError for invalid addresses, valid addresses are remembered
+#
+@lru_cache(maxsize=128)
+def ip_address(address):
+    ## inet_pton only accepts the full dotted quad form, unlike inet_aton
+    try:
+        socket.inet_pton(socket.AF_INET, address)
+    except OSError:
+        raise ValueError(address)
+    return True
 
 ## class that contains all GUI specifics
 #
 class Gui:
+    ## interval for running calls handed over by the communication thread in ms
+    DRAIN_INTERVAL = 50
+
     def __init__(self,master):
+        ## calls handed over by the communication thread, see post
+        self._ui_queue = queue.Queue()
+        self._drain_pending = None
+        self._last_comm = None ## last accepted communication settings
 
         ## configure app window
         master.title('Python Modbus Monitor')
@@ -530,11 +944,12 @@ class Gui:
 
         Button(filesframe,text='…',command=(self.selectLoggerDataFile)).grid(row=1,column=2,sticky='W') ## opens dialog to choose file from
 
-        ## enable daily log option in GUI, has no own action, will be regarded during log write
-        self.checked_daily = IntVar()
+        ## enable daily log option in GUI, the choice is copied to data for the log writer
+        self.checked_daily = IntVar(value=int(data.dailylog))
         self.checkManageData=Checkbutton(filesframe,
                                          text='Create daily log file',
-                                         variable=self.checked_daily
+                                         variable=self.checked_daily,
+                                         command=self.setDailyLog
                                          )
         self.checkManageData.grid(row=2,column=0,columnspan=3)
 
@@ -561,6 +976,37 @@ class Gui:
         Label(self.settingsframe, text='Log Interval[s]:').grid(row=6,column=0,sticky = 'E')
         Button(self.settingsframe,text='⮴ Update Settings',bg='lightgreen',command=(self.updateCommSettings)).grid(row=7,column=2, sticky='W')
 
+        ## current values and input fields, the values are filled in by displayCommSettings
+        self.current_ipaddress = Label(self.settingsframe, bg='white')
+        self.current_ipaddress.grid (row=2,column=1,sticky='EW')
+        self.input_ipaddress = Entry(self.settingsframe, width=15, fg='blue')
+        self.input_ipaddress.grid(row=2,column=2, sticky = 'W') # needs to be on a seperate line for variable to work
+        self.input_ipaddress.bind('<Return>',self.updateCommSettings) ## enable the Entry to update without button click
+
+        self.current_portno = Label(self.settingsframe, bg='white')
+        self.current_portno.grid (row=3,column=1,sticky='EW')
+        self.input_portno = Entry(self.settingsframe, width=5, fg='blue')
+        self.input_portno.grid(row=3,column=2, sticky = 'W')
+        self.input_portno.bind('<Return>',self.updateCommSettings) ## update without button click
+
+        self.current_modbusid = Label(self.settingsframe, bg='white')
+        self.current_modbusid.grid (row=4,column=1,sticky='EW')
+        self.input_modbusid = Entry(self.settingsframe, width=5, fg='blue')
+        self.input_modbusid.grid(row=4,column=2, sticky = 'W')
+        self.input_modbusid.bind('<Return>',self.updateCommSettings) ## update without button click
+
+        self.current_manufacturer = Label(self.settingsframe, bg='white')
+        self.current_manufacturer.grid (row=5,column=1,sticky='EW')
+        self.input_manufacturer = Entry(self.settingsframe, width=25, fg='blue')
+        self.input_manufacturer.grid(row=5,column=2, sticky = 'W')
+        self.input_manufacturer.bind('<Return>',self.updateCommSettings) ## update without button click
+
+        self.current_loginterval = Label(self.settingsframe, bg='white')
+        self.current_loginterval.grid (row=6,column=1,sticky='EW')
+        self.input_loginterval = Entry(self.settingsframe, width=3, fg='blue')
+        self.input_loginterval.grid(row=6,column=2, sticky = 'W')
+        self.input_loginterval.bind('<Return>',self.updateCommSettings) ## update without button click
+
         ## frame for entering and displaying the data objects
         self.datasettingsframe = Frame(self.settingscanvas,bd=1,relief='groove')
         self.datasettingsframe.columnconfigure(3,weight=1) ## make description field fit the window
@@ -600,50 +1046,60 @@ class Gui:
         self.checkManageData=Checkbutton(self.datasettingsframe,
                                          text='Manage data sets',
                                          variable=self.checked_manage,
-                                         command=self.displayDatasets,
+                                         command=self._toggle_manage,
                                          )
         self.checkManageData.grid(row=3,column=0,columnspan=3)
 
-        ## canvas for displaying monitored data
-        self.datacanvas = Canvas(master,bd=1,bg="green",highlightthickness=0)
-        self.datacanvas.pack(anchor='sw',side='top',expand=True,fill='both')
-        ## frame that holds all data to display. the static data table and the polled data
-        self.dataframe = Frame(self.datacanvas)
-        self.dataframe.pack(side='left',expand=True,fill='both')
-        ## frame for static data table
-        self.datadisplayframe = Frame(self.dataframe,bd=1,relief='groove')
-        #self.datadisplayframe = Frame(self.datacanvas,bd=1,relief='groove')
-        self.datadisplayframe.pack(side='left', anchor='nw',expand=True,fill='both')
-        ## frame for data from target
-        self.targetdataframe = Frame(self.dataframe,bg='white',relief='groove',bd=1)
-        self.targetdataframe.pack(side='left', anchor='nw',expand=True,fill='both')
-        #self.targetdataframe.grid(column=1, row=0)
+        ## table of the data sets and the polled data
+        #  the Treeview is a single widget that only draws the rows visible in its window
+        self.datadisplayframe = Frame(master,bd=1,relief='groove')
+        self.datadisplayframe.pack(anchor='sw',side='top',expand=True,fill='both')
+        self.datadisplayframe.rowconfigure(1,weight=1)
+        self.datadisplayframe.columnconfigure(0,weight=1)
+        ## buttons for managing the selected data set, only shown when managing is enabled
+        self.manageframe = Frame(self.datadisplayframe)
+        Button(self.manageframe,text='↑ Up',command=lambda:(self._manageSelected(self.moveDatasetUp))).pack(side='left')
+        Button(self.manageframe,text='↓ Down',command=lambda:(self._manageSelected(self.moveDatasetDown))).pack(side='left')
+        Button(self.manageframe,text='- Delete',command=lambda:(self._manageSelected(self.deleteDataset))).pack(side='left')
+        self.manageframe.grid(row=0,column=0,columnspan=2,sticky='W')
+        self.manageframe.grid_remove()
+        ## one row per data set, row n of the table shows data.datasets[n+1]
+        self.datatree = ttk.Treeview(self.datadisplayframe,
+                                     columns=('address','type','format','description','unit','value'),
+                                     show='headings',
+                                     selectmode='browse')
+        for column, heading, width, stretch in (('address','Addr.',60,False),
+                                                 ('type','Type',60,False),
+                                                 ('format','Format',60,False),
+                                                 ('description','Description',200,True),
+                                                 ('unit','Unit',50,False),
+                                                 ('value','Value',100,False)):
+            self.datatree.heading(column,text=heading)
+            self.datatree.column(column,width=width,stretch=stretch)
+        self.datatree.grid(row=1,column=0,sticky='NSEW')
         ## add scrollbar for many data rows
-        self.datascrollbar = Scrollbar(self.datacanvas, orient='vertical', command=self.datacanvas.yview)
-        self.datascrollbar.pack(side='right',fill='y')
-        #self.datascrollbar = Scrollbar(self.datacanvas, orient='vertical', command=self.datacanvas.yview)
-        self.datacanvas.configure(yscrollcommand=self.datascrollbar.set)
-
-        ## make data table fit in scrollable frame
-        self.datacanvas.create_window((0,0), window=self.dataframe, anchor='nw',tags='dataframe')
+        self.datascrollbar = Scrollbar(self.datadisplayframe, orient='vertical', command=self.datatree.yview)
+        self.datascrollbar.grid(row=1,column=1,sticky='NS')
+        self.datatree.configure(yscrollcommand=self.datascrollbar.set)
+        ## value shown in each row, updateLoggerDisplay only touches rows whose value changed
+        self._shown_values = {}
 
         ## fill the datafields with the current settings
         self.displayCommSettings()
         self.displayDatasets()
 
-        self.update_data_layout()
-
-    ## function for updating the data view after adding content to make the scrollbar work correctly
-    def update_data_layout(self):
-        self.dataframe.update_idletasks()
-        self.datacanvas.configure(scrollregion=self.datacanvas.bbox('all'))
-        
-
     def displaySettings(self):
-        ## read import file and update displayed data
-        inout.readImportFile()
-        self.displayCommSettings()
-        self.displayDatasets()
+        ## read import file and update the displayed data that was changed by it
+        commchanged, datasetschanged = inout.readImportFile()
+        self.showSettings(commchanged, datasetschanged)
+
+    ## function for showing the current settings, communication settings and
+    #  datasets are only refreshed when requested
+    def showSettings(self,comm=True,datasets=True):
+        if comm:
+            self.displayCommSettings()
+        if datasets:
+            self.displayDatasets()
 
         ## update logfile display
         self.input_logfilename.delete(0,END)
@@ -654,163 +1110,180 @@ class Gui:
         self.input_inifilename.insert(0,data.inifilename)
 
     def displayDatasets(self):
-        ## display all currently available datasets
-        for widget in self.datadisplayframe.winfo_children():
-            widget.destroy()
-
-        if (self.checked_manage.get()):
-            Label(self.datadisplayframe,text='Up').grid(row=0,column=0)
-            Label(self.datadisplayframe,text='Down').grid(row=0,column=1)
-            Label(self.datadisplayframe,text='Delete').grid(row=0,column=2)
-
-        thisdata = '' ## make local variable known
-        for thisdata in data.datasets:
-            counter = data.datasets.index(thisdata) ## to keep track of the current row
-            if (self.checked_manage.get()):
-                ## add some buttons to change order of items and also to delete them
-                if (counter > 1): ## first dataset cannot be moved up
-                    buttonUp=Button(self.datadisplayframe,
-                                    text='↑',
-                                    command=lambda i=counter:(self.moveDatasetUp(i)))
-                    buttonUp.grid(row=(counter),column = 0)
-                if ((counter > 0) and (counter != (len(data.datasets)-1))): ## last dataset cannot be moved down
-                    buttonDown=Button(self.datadisplayframe,
-                                      text='↓',
-                                      command=lambda i=counter:(self.moveDatasetDown(i)))
-                    buttonDown.grid(row=(counter),column = 1)
-                if (counter > 0): ## do not remove dataset [0]
-                    buttonDelete=Button(self.datadisplayframe,
-                                        text='-',
-                                        command=lambda i=counter:(self.deleteDataset(i)))
-                    buttonDelete.grid(row=(counter),column = 2)
-
-            ## add the currently stored data for the dataset
-            Label(self.datadisplayframe,width=3,text=counter).grid(row=(counter),column=3)
-            Label(self.datadisplayframe,width=6,text=thisdata[0]).grid(row=(counter),column=4)
-            Label(self.datadisplayframe,width=7,text=thisdata[1]).grid(row=(counter),column=5)
-            Label(self.datadisplayframe,width=7,text=thisdata[2]).grid(row=(counter),column=6)
-            Label(self.datadisplayframe,width=25,text=thisdata[3]).grid(row=(counter),column=7,sticky='ew')
-            Label(self.datadisplayframe,width=6,text=thisdata[4]).grid(row=(counter),column=8)
-
-        self.update_data_layout()
-   
+        ## display all currently available datasets, one insert per dataset
+        #  the first dataset holds the column names, they are shown as table headings
+        tree = self.datatree
+        tree.delete(*tree.get_children())
+        self._shown_values = {}
+        inout._last_vector = None ## the new rows have no values yet, show the next poll in any case
+        for thisdata in data.datasets[1:]:
+            tree.insert('','end',values=tuple(thisdata[:5]))
+
+        self._toggle_manage()
+
+    ## show or hide the buttons for managing the datasets
+    def _toggle_manage(self):
+        if self.checked_manage.get():
+            self.manageframe.grid()
+        else:
+            self.manageframe.grid_remove()
+
+    ## apply one of the management functions to the selected dataset
+    def _manageSelected(self,action):
+        selection = self.datatree.selection()
+        if selection:
+            action(self.datatree.index(selection[0])+1)
+
     ## reorder the datasets, move current dataset one up
     def moveDatasetUp(self,current_position):
         i = current_position
-        data.datasets[i], data.datasets[(i-1)] = data.datasets[(i-1)], data.datasets[i]
-        self.displayDatasets()
+        if (i < 2): ## dataset [0] holds the column names, nothing can be moved above it
+            return
+        datasets = list(data.datasets)
+        datasets[i], datasets[(i-1)] = datasets[(i-1)], datasets[i]
+        data.setDatasets(datasets)
+        ## the row keeps its polled value and the selection while moving
+        self.datatree.move(self.datatree.get_children()[i-1],'',i-2)
 
     ## reorder the datasets, move current dataset one down
     def moveDatasetDown(self,current_position):
         i = current_position
-        data.datasets[i], data.datasets[(i+1)] = data.datasets[(i+1)], data.datasets[i]
-        self.displayDatasets()
+        if (i >= len(data.datasets)-1): ## last dataset cannot be moved down
+            return
+        datasets = list(data.datasets)
+        datasets[i], datasets[(i+1)] = datasets[(i+1)], datasets[i]
+        data.setDatasets(datasets)
+        ## the row keeps its polled value and the selection while moving
+        self.datatree.move(self.datatree.get_children()[i-1],'',i)
 
     ## reorder the datasets, delete the current dataset
     def deleteDataset(self,current_position):
         i = current_position
-        del data.datasets[i]
-        self.displayDatasets()
+        data.setDatasets(data.datasets[:i] + data.datasets[i+1:])
+        self.datatree.delete(self.datatree.get_children()[i-1])
 
+    ## show the current communication settings and clear the input fields
     def displayCommSettings(self):
-        self.current_ipaddress = Label(self.settingsframe, text=data.ipaddress, bg='white')
-        self.current_ipaddress.grid (row=2,column=1,sticky='EW')
-        self.input_ipaddress = Entry(self.settingsframe, width=15, fg='blue')
-        self.input_ipaddress.grid(row=2,column=2, sticky = 'W') # needs to be on a seperate line for variable to work
-        self.input_ipaddress.bind('<Return>',self.updateCommSettings) ## enable the Entry to update without button click
+        self.current_ipaddress.configure(text=data.ipaddress)
+        self.current_portno.configure(text=data.portno)
+        self.current_modbusid.configure(text=data.modbusid)
+        self.current_manufacturer.configure(text=data.manufacturer)
+        self.current_loginterval.configure(text=data.loginterval)
+        for entry in (self.input_ipaddress, self.input_portno, self.input_modbusid,
+                      self.input_manufacturer, self.input_loginterval):
+            if entry.get() != '':
+                entry.delete(0,END)
 
-        self.current_portno = Label(self.settingsframe, text=data.portno, bg='white')
-        self.current_portno.grid (row=3,column=1,sticky='EW')
-        self.input_portno = Entry(self.settingsframe, width=5, fg='blue')
-        self.input_portno.grid(row=3,column=2, sticky = 'W')
-        self.input_portno.bind('<Return>',self.updateCommSettings) ## update without button click
-
-        self.current_modbusid = Label(self.settingsframe, text=data.modbusid, bg='white')
-        self.current_modbusid.grid (row=4,column=1,sticky='EW')
-        self.input_modbusid = Entry(self.settingsframe, width=5, fg='blue')
-        self.input_modbusid.grid(row=4,column=2, sticky = 'W')
-        self.input_modbusid.bind('<Return>',self.updateCommSettings) ## update without button click
-
-        self.current_manufacturer = Label(self.settingsframe, text=data.manufacturer, bg='white')
-        self.current_manufacturer.grid (row=5,column=1,sticky='EW')
-        self.input_manufacturer = Entry(self.settingsframe, width=25, fg='blue')
-        self.input_manufacturer.grid(row=5,column=2, sticky = 'W')
-        self.input_manufacturer.bind('<Return>',self.updateCommSettings) ## update without button click
-
-        self.current_loginterval = Label(self.settingsframe, text=data.loginterval, bg='white')
-        self.current_loginterval.grid (row=6,column=1,sticky='EW')
-        self.input_loginterval = Entry(self.settingsframe, width=3, fg='blue')
-        self.input_loginterval.grid(row=6,column=2, sticky = 'W')
-        self.input_loginterval.bind('<Return>',self.updateCommSettings) ## update without button click
-        
     ## function for updating communication parameters with input sanitation
     #  if no values are given in some fields the old values are preserved
     #
     def updateCommSettings(self,*args):
 
-        #print('update Communication Settings:')
-        if self.input_ipaddress.get() != '':
-            thisipaddress = str(self.input_ipaddress.get())
+        log.debug('update Communication Settings')
+        thisipaddress = self.input_ipaddress.get()
+        thisportno = self.input_portno.get()
+        thismodbusid = self.input_modbusid.get()
+        thismanufacturer = self.input_manufacturer.get()
+        thisloginterval = self.input_loginterval.get()
+
+        ## nothing to do if no entry differs from the settings accepted last time
+        current = (data.ipaddress, data.portno, data.modbusid, data.manufacturer, data.loginterval)
+        if current == self._last_comm:
+            entries = (thisipaddress, thisportno, thismodbusid, thismanufacturer, thisloginterval)
+            if all(entry in ('', str(value)) for entry, value in zip(entries, current)):
+                return
+
+        if thisipaddress != '':
             ## test if the data seems to be a valid IP address
             try:
-                self.ip_address(thisipaddress)
-                data.ipaddress = str(self.input_ipaddress.get())
-            except:
+                ip_address(thisipaddress)
+                data.ipaddress = thisipaddress ## if valid ip address entered store it
+            except ValueError:
                 messagebox.showerror('IP Address Error','the data you entered seems not to be a correct IP address')
-            ## if valid ip address entered store it
 
-        if self.input_portno.get() != '':
+        if thisportno != '':
             ## test if the portnumber seems to be a valid value
             try:
-                check_portno = int(self.input_portno.get())
+                check_portno = int(thisportno)
                 if check_portno < 0:
                     raise ValueError
             except ValueError:
                 messagebox.showerror('Port Number Error','the value you entered seems not to be a valid port number')
                 return
-            data.portno = int(self.input_portno.get())
+            data.portno = check_portno
 
-        if self.input_modbusid.get() != '':
+        if thismodbusid != '':
             ## test if the modbus ID seems to be a valid value
             try:
-                check_modbusid = int(self.input_portno.get())
+                check_modbusid = int(thismodbusid)
                 if check_modbusid < 0:
                     raise ValueError
             except ValueError:
-                messagebox.showerror('Port Number Error','the value you entered seems not to be a valid Modbus ID')
+                messagebox.showerror('Modbus ID Error','the value you entered seems not to be a valid Modbus ID')
                 return
-            data.modbusid = int(self.input_modbusid.get())
+            data.modbusid = check_modbusid
 
-        if self.input_manufacturer.get() != '':
-            data.manufacturer = (self.input_manufacturer.get())
+        if thismanufacturer != '':
+            data.manufacturer = thismanufacturer
 
-        if self.input_loginterval.get() != '':
+        if thisloginterval != '':
             ## test if the logger intervall seems to be a valid value
             try:
-                check_loginterval = int(self.input_loginterval.get())
+                check_loginterval = int(thisloginterval)
                 if check_loginterval < 1:
                     raise ValueError
             except ValueError:
                 messagebox.showerror('Logger Interval Error','the value you entered seems not to be a valid logger intervall')
                 return
-            data.loginterval = int(self.input_loginterval.get())
+            data.loginterval = check_loginterval
 
         self.displayCommSettings()
+        self._last_comm = (data.ipaddress, data.portno, data.modbusid, data.manufacturer, data.loginterval)
 
     ## function for starting communication and changing button function and text
     #
     def startCommunication(self):
+        if (self._drain_pending != None): ## already running, e.g. after a double click
+            return
         inout.runCommunication()
         self.commButton.configure(text='⏹ Stop Communication',bg='red', command=(self.stopCommunication))
+        self._drainQueue()
 
     def stopCommunication(self):
+        if (self._drain_pending == None): ## already stopped
+            return
         inout.stopCommunication()
         self.commButton.configure(text='▶ Start Communication',bg='lightblue', command=(self.startCommunication))
+        ## show what the communication thread handed over last, then stop draining
+        self.commButton.after_cancel(self._drain_pending)
+        self._drain_pending = None
+        self._drainQueue(repeat=False)
+
+    ## function for handing a function call from another thread to the Tk thread
+    #
+    def post(self,function,*args):
+        self._ui_queue.put((function, args))
+
+    ## function for running the calls handed over by post
+    #  repeats every DRAIN_INTERVAL ms while the communication is running
+    def _drainQueue(self,repeat=True):
+        while True:
+            try:
+                function, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            function(*args)
+        if repeat:
+            self._drain_pending = self.commButton.after(self.DRAIN_INTERVAL, self._drainQueue)
 
     ## function for reading configuration file
     #
     def selectImportFile(self):
-        data.inifilename = filedialog.askopenfilename(title = 'Choose Configuration File',defaultextension='.ini',filetypes=[('Configuration file','*.ini'), ('All files','*.*')])
+        thisfilename = filedialog.askopenfilename(title = 'Choose Configuration File',defaultextension='.ini',filetypes=[('Configuration file','*.ini'), ('All files','*.*')])
+        ## if the dialog was closed with no file selected ('cancel') keep everything as it is
+        if not thisfilename:
+            return
+        data.inifilename = thisfilename
 
         ## update displayed filename in entry field
         self.input_inifilename.delete(0,END)
@@ -818,28 +1291,17 @@ class Gui:
 
         self.displaySettings()
 
-    ## function for checking for seemingly correct IP address input
-    #
-    def ip_address(self,address):
-        valid = address.split('.')
-        if len(valid) != 4:
-            raise ValueError
-        for element in valid:
-            if not element.isdigit():
-                raise ValueError
-                break
-            i = int(element)
-            if i < 0 or i > 255:
-                raise ValueError
-        return
-
     ## function for selecting configuration export file
     #
     def selectExportFile(self):
-        data.inifilename = filedialog.asksaveasfilename(initialfile = data.inifilename,
+        thisfilename = filedialog.asksaveasfilename(initialfile = data.inifilename,
                                                   title = 'Choose Configuration File',
                                                   defaultextension='.ini',
                                                   filetypes=[('Configuration file','*.ini'), ('All files','*.*')])
+        ## if the dialog was closed with no file selected ('cancel') nothing is written
+        if not thisfilename:
+            return
+        data.inifilename = thisfilename
 
         ## update displayed filename in entry field
         self.input_inifilename.delete(0,END)
@@ -847,30 +1309,37 @@ class Gui:
 
         inout.writeExportFile()
 
+    ## function for taking over the daily log option from the checkbox
+    #
+    def setDailyLog(self):
+        data.dailylog = bool(self.checked_daily.get())
+
     ## function for choosing logger data file
     #
     def selectLoggerDataFile(self):
-        data.logfilename = filedialog.asksaveasfilename(initialfile = data.logfilename, title = 'Choose File for Logger Data', defaultextension='.csv',filetypes=[('CSV file','*.csv'), ('All files','*.*')])
+        thisfilename = filedialog.asksaveasfilename(initialfile = data.logfilename, title = 'Choose File for Logger Data', defaultextension='.csv',filetypes=[('CSV file','*.csv'), ('All files','*.*')])
+        ## if the dialog was closed with no file selected ('cancel') keep the current log file
+        if not thisfilename:
+            return
+        data.logfilename = thisfilename
         self.input_logfilename.delete(0,END)
         self.input_logfilename.insert(0,data.logfilename)
 
     ## function for updating the current received data on display
     #
     def updateLoggerDisplay(self):
-        thisdata = '' ## make variable data known
-        ## delete old data
-        for displayed in self.targetdataframe.winfo_children():
-            displayed.destroy()
-        ## display new data
-        Label(self.targetdataframe,text='Value').grid(row=0,column=0)
-        for thisdata in data.datavector:
-            ## send data to display table
-            Label(self.targetdataframe,text=thisdata,bg='white').grid(column=0,sticky='e')
+        tree = self.datatree
+        shown = self._shown_values
+        ## send data to the value column of the data set rows, unchanged cells are skipped
+        for iid, thisdata in zip(tree.get_children(), data.datavector):
+            if (shown.get(iid, '') != thisdata):
+                tree.set(iid,'value','' if thisdata is None else thisdata)
+                shown[iid] = thisdata
 
     ## function for setting program preferences (if needed)
     #
     def dataSettings(self):
-        print('dataSettings')
+        log.debug('dataSettings')
 
     ## function for updating the configuration file
     #   with the path entered into the text field
@@ -894,8 +1363,8 @@ class Gui:
                           self.input_dataformat.get(),
                           self.input_description.get(),
                           self.input_dataunit.get()])
-        self.displayDatasets()
-        #print(data.datasets)
+        self.datatree.insert('','end',values=tuple(data.datasets[-1][:5]))
+        log.debug('Current datasets: %s', data.datasets)
 
     ## function for displaying the about dialog
     #
@@ -906,7 +1375,19 @@ class Gui:
     ## function for closing the program window
     #
     def closeWindow(self):
-        exit()
+        sys.exit()
+
+## types of the command line options for single-value reads
+_CLI_SCHEMA = {
+        '--ip':     str,
+        '--id':     int,
+        '--port':   int,
+        '--addr':   int,
+        '--type':   str,
+        '--format': str,
+        '--descr':  str,
+        '--unit':   str
+        }
 
 ## create a data object
 data = Data()
@@ -917,14 +1398,32 @@ inout = Inout()
 ## what to do on program exit
 atexit.register(inout.cleanOnExit)
 
+## a log file for each day can be requested by command line, in the GUI it can be changed later
+data.dailylog = bool(arguments['--daily-log'])
+
+## get log file format and check that it can be written
+if (arguments['--logformat'] not in (None, 'csv')):
+    if (arguments['--logformat'] != 'feather'):
+        print('Log format error. The log format must be csv or feather.')
+        sys.exit(1)
+    if (pyarrow == None):
+        print('Import errror. pyarrow package was not found on your system. Please install it using the command: "pip install pyarrow"')
+        sys.exit(1)
+    data.logformat = 'feather'
+
 ## create main program window
 ## if we are in command line mode lets detect it
 gui_active = 0
-if (arguments['--nogui'] == False):
+## the graphical interface library is only loaded when it is going to be used,
+#  runs with --nogui or without a display do not pay for importing tkinter and its display libraries
+has_display = ((sys.platform in ('win32', 'cygwin', 'darwin')) or
+               bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')))
+if ((arguments['--nogui'] == False) and has_display):
     ## load graphical interface library
     from tkinter import *
     from tkinter import messagebox
     from tkinter import filedialog
+    from tkinter import ttk
     try: ## if the program was called from command line without parameters
         window = Tk()
         ## create window container
@@ -932,16 +1431,19 @@ if (arguments['--nogui'] == False):
         gui_active = 1
         if (arguments['--inifile'] != None):
             inout.checkImportFile()
-            gui.displaySettings()
+            gui.showSettings()
     
         mainloop()
-        exit() ## if quitting from GUI do not proceed further down to command line handling
+        sys.exit() ## if quitting from GUI do not proceed further down to command line handling
     except TclError:
         ## check if one of the required command line parameters is set
         if ((arguments['--inifile'] == None) and (arguments['--ip'] == None)):
             print('Error. No graphical interface found. Try "python pymodmon.py -h" for help.')
-            exit()
+            sys.exit(1)
         ## else continue with command line execution
+elif ((arguments['--inifile'] == None) and (arguments['--ip'] == None)):
+    print('Error. No graphical interface found. Try "python pymodmon.py -h" for help.')
+    sys.exit(1)
 
 ########     this section handles all command line logic    ##########################
 
@@ -952,7 +1454,7 @@ if (arguments['--inifile'] != None):
 ## get log file name and try to access it
 if (arguments['--logfile'] != None):
     data.logfilename = str(arguments['--logfile'])
-    inout.writeLoggerDataFile() ## initial write to file, tests for file
+    inout._writeLogData() ## initial write to file, tests for file
 
 ## get log interval value and check for valid value
 if (arguments['--loginterval'] != None):
@@ -962,7 +1464,7 @@ if (arguments['--loginterval'] != None):
             raise ValueError
     except ValueError:
         print('Log interval error. The interval must be 1 or more.')
-        exit()
+        sys.exit(1)
     data.loginterval = int(arguments['--loginterval'])
 
 ## get log buffer size and check for valid value
@@ -973,23 +1475,27 @@ if (arguments['--logbuffer'] != None):
             raise ValueError
     except ValueError:
         print('Log buffer error. The log buffer must be 1 or more.')
-        exit()
+        sys.exit(1)
     data.logmaxbuffer = int(arguments['--logbuffer'])
 
 ## get all values for single-value reads
 ## all obligatory entries. missing entries will be caught by docopt.
 #  only simple checks will be done, because if there are errors, communication will fail.
 if (arguments['--ip'] != None): ## just a check for flow logic, skipped when working with inifile
-    data.ipaddress = str(arguments['--ip'])
-    data.modbusid = int(arguments['--id'])
-    data.port = int(arguments['--port'])
+    ## convert all given values once, description and unit are optional
+    cli = {option: convert(arguments[option]) for option, convert in _CLI_SCHEMA.items()
+           if arguments[option] != None}
+    data.ipaddress = cli['--ip']
+    data.modbusid = cli['--id']
+    data.portno = cli['--port']
     ## because called from command line data.datasets has only one entry
     #  we can just append and use same mechanics as in "normal" mode
-    data.datasets.append( [int(arguments['--addr']),
-                           str(arguments['--type']),
-                           str(arguments['--format']),
-                           str(arguments['--descr']),
-                           str(arguments['--unit']) ] )
+    data.datasets.append( [cli['--addr'],
+                           cli['--type'],
+                           cli['--format'],
+                           cli.get('--descr',''),
+                           cli.get('--unit','') ] )
+    data.datasetsChanged()
 
 ## start polling data
 ## single poll first
@@ -998,4 +1504,9 @@ inout.runCommunication()
 if (arguments['--single'] == True):
     inout.stopCommunication()
     print('single run')
-    exit()
+    sys.exit()
+## continuous polling runs in the communication thread until the program is interrupted
+try:
+    inout.waitCommunication()
+except KeyboardInterrupt:
+    pass ## cleanOnExit stops the communication and writes the buffered data